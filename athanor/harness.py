@@ -0,0 +1,419 @@
+"""Differential accuracy and speed harness for alternative implementations of the Vector math.
+
+Every backend implements the same operations on plain coordinate tuples. The reference backend
+goes through Vector and Point, so any faster backend is checked against the library's own results.
+The oracle backend computes exact results, rounded once to float. It tells the cases where the
+reference itself overflows, underflows or raises apart from the ones where a backend is wrong.
+
+Run ``python -m athanor.harness`` to print the accuracy and speedup report of every available backend.
+"""
+import argparse
+import decimal
+import math
+import random
+import struct
+import time
+from fractions import Fraction
+
+from .points import Point
+from .vectors import FreeVector
+
+OPERATIONS = ("norm", "unitary", "distance", "add", "subtract", "scale")
+
+class Tolerance:
+     """Accepted error of a backend against the reference.
+
+     A result is accepted within `ulps` units in the last place or within `rel` relative error.
+     """
+     def __init__(self, ulps:int=0, rel:float=0.0):
+          assert ulps >= 0 and rel >= 0, "Tolerances must be non-negative."
+          self.ulps = ulps
+          self.rel = rel
+
+     def __repr__(self):
+          return f"Tolerance (ulps={self.ulps}, rel={self.rel:g})"
+
+     def accepts(self, value, expected) -> bool:
+          return ulp_distance(value, expected) <= self.ulps or relative_error(value, expected) <= self.rel
+
+# Element-wise operations round once per coordinate, so they must match exactly.
+# Reductions may reorder or rescale the sum, which costs a few roundings: 4 ulps, or 1e-15 relative
+# (4.5 to 9 ulps depending on the mantissa) so that the small coordinates of a unitary vector,
+# measured against its largest one, are not held to a tighter bound than the large ones.
+TOLERANCES = {
+     "norm": Tolerance(ulps=4, rel=1e-15),
+     "unitary": Tolerance(ulps=4, rel=1e-15),
+     "distance": Tolerance(ulps=4, rel=1e-15),
+     "add": Tolerance(ulps=0),
+     "subtract": Tolerance(ulps=0),
+     "scale": Tolerance(ulps=0),
+}
+
+# The reference is in range for a case when it is this close to the exact result. Naive summation over
+# 64 coordinates and the rounded 1/p exponent of the p-norm cost up to about 1e-14; overflow, underflow
+# and subnormal intermediates cost far more.
+REFERENCE_RANGE = Tolerance(rel=1e-12)
+
+def _ordered_bits(x:float) -> int:
+     """Maps a float to an integer so that consecutive floats map to consecutive integers."""
+     bits = struct.unpack("<q", struct.pack("<d", x))[0]
+     return bits if bits >= 0 else -(bits & 0x7FFFFFFFFFFFFFFF)
+
+def ulp_distance(value, expected) -> float:
+     """Number of representable floats between two results.
+
+     Tuples are compared coordinate by coordinate, keeping the worst one.
+     """
+     if isinstance(expected, tuple):
+          if not isinstance(value, tuple) or len(value) != len(expected):
+               return math.inf
+          return max((ulp_distance(v, e) for v, e in zip(value, expected)), default=0)
+     if value == expected:
+          return 0
+     if not (math.isfinite(value) and math.isfinite(expected)):
+          return math.inf
+     return abs(_ordered_bits(float(value)) - _ordered_bits(float(expected)))
+
+def relative_error(value, expected) -> float:
+     """Relative error of a result. Tuples use the largest coordinate error over the largest reference coordinate."""
+     if isinstance(expected, tuple):
+          if not isinstance(value, tuple) or len(value) != len(expected):
+               return math.inf
+          errors = [abs(v - e) for v, e in zip(value, expected)]
+          # max() drops a NaN unless it comes first, so a NaN coordinate must be caught here
+          if any(math.isnan(error) for error in errors):
+               return math.inf
+          error = max(errors, default=0)
+          scale = max((abs(e) for e in expected), default=0)
+     else:
+          error = abs(value - expected)
+          scale = abs(expected)
+     if error == 0:
+          return 0.0
+     if scale == 0 or not math.isfinite(error):
+          return math.inf
+     return error / scale
+
+class Backend:
+     """A named set of implementations of OPERATIONS working on coordinate tuples."""
+     def __init__(self, name:str, **operations):
+          missing = set(OPERATIONS) - set(operations)
+          assert not missing, f"Backend {name} is missing operations: {sorted(missing)}."
+          self.name = name
+          self.operations = operations
+
+     def __repr__(self):
+          return f"Backend ({self.name})"
+
+     def __getitem__(self, operation:str):
+          return self.operations[operation]
+
+def reference_backend() -> Backend:
+     """The current pure-Python Vector and Point math."""
+     return Backend(
+          "reference",
+          norm=lambda a, p=2: FreeVector(a).norm(p),
+          unitary=lambda a: FreeVector(a).unitary().coords,
+          distance=lambda a, b: Point(a).distance_to(Point(b)),
+          add=lambda a, b: (FreeVector(a) + FreeVector(b)).coords,
+          subtract=lambda a, b: (FreeVector(a) - FreeVector(b)).coords,
+          scale=lambda a, scalar: (FreeVector(a) * scalar).coords,
+     )
+
+# Enough digits for the p-th powers of doubles, and an exponent range no float computation can leave
+_EXACT = decimal.Context(prec=60, Emax=decimal.MAX_EMAX, Emin=decimal.MIN_EMIN)
+
+def _to_float(value) -> float:
+     """Correctly rounded float of an exact value, infinite when it is beyond the float range."""
+     try:
+          return float(value)
+     except OverflowError:
+          return math.inf if value > 0 else -math.inf
+
+def _exact_norm(a, p=2) -> decimal.Decimal:
+     with decimal.localcontext(_EXACT):
+          total = sum((abs(decimal.Decimal(coord)) ** decimal.Decimal(p) for coord in a), decimal.Decimal(0))
+          if p == 2:
+               return total.sqrt()
+          return total ** (decimal.Decimal(1) / decimal.Decimal(p))
+
+def _exact_unitary(a):
+     magnitude = _exact_norm(a)
+     if magnitude == 0:
+          return tuple(a)
+     with decimal.localcontext(_EXACT):
+          return tuple(_to_float(decimal.Decimal(coord) / magnitude) for coord in a)
+
+def _exact_distance(a, b):
+     with decimal.localcontext(_EXACT):
+          return _to_float(_exact_norm(tuple(decimal.Decimal(x) - decimal.Decimal(y) for x, y in zip(a, b))))
+
+def oracle_backend() -> Backend:
+     """Exact results rounded once to float, the ground truth for both the reference and the backends."""
+     return Backend(
+          "oracle",
+          norm=lambda a, p=2: _to_float(_exact_norm(a, p)),
+          unitary=_exact_unitary,
+          distance=_exact_distance,
+          add=lambda a, b: tuple(_to_float(Fraction(x) + Fraction(y)) for x, y in zip(a, b)),
+          subtract=lambda a, b: tuple(_to_float(Fraction(x) - Fraction(y)) for x, y in zip(a, b)),
+          scale=lambda a, scalar: tuple(_to_float(Fraction(coord) * Fraction(scalar)) for coord in a),
+     )
+
+def _math_norm(a, p=2):
+     if p == 2:
+          return math.hypot(*a)
+     largest = max((abs(coord) for coord in a), default=0.0)
+     if largest == 0 or math.isinf(largest):
+          return largest
+     # Scaling by a power of two is exact and keeps the powers of the coordinates within the float range
+     _, exponent = math.frexp(largest)
+     total = math.fsum(abs(math.ldexp(coord, -exponent)) ** p for coord in a)
+     return math.ldexp(total ** (1 / p), exponent)
+
+def _math_unitary(a):
+     magnitude = math.hypot(*a)
+     if magnitude == 0:
+          return tuple(a)
+     return tuple(coord / magnitude for coord in a)
+
+def math_backend() -> Backend:
+     """Plain tuples and the math module, without building Vector and Point objects."""
+     return Backend(
+          "math",
+          norm=_math_norm,
+          unitary=_math_unitary,
+          distance=math.dist,
+          add=lambda a, b: tuple(x + y for x, y in zip(a, b)),
+          subtract=lambda a, b: tuple(x - y for x, y in zip(a, b)),
+          scale=lambda a, scalar: tuple(coord * scalar for coord in a),
+     )
+
+def numpy_backend() -> Backend | None:
+     """NumPy arrays, converted from and back to tuples on every call. Returns None when NumPy is not installed."""
+     try:
+          import numpy as np
+     except ImportError:
+          return None
+
+     def norm(a, p=2):
+          coords = np.abs(np.asarray(a, dtype=float))
+          largest = float(coords.max(initial=0.0))
+          if largest == 0 or math.isinf(largest):
+               return largest
+          # Same exact power-of-two scaling as the math backend, np.linalg.norm does not rescale
+          _, exponent = math.frexp(largest)
+          return math.ldexp(float(np.linalg.norm(np.ldexp(coords, -exponent), ord=p)), exponent)
+
+     def unitary(a):
+          magnitude = norm(a)
+          if magnitude == 0:
+               return tuple(a)
+          return tuple((np.asarray(a, dtype=float) / magnitude).tolist())
+
+     return Backend(
+          "numpy",
+          norm=norm,
+          unitary=unitary,
+          distance=lambda a, b: norm(np.subtract(a, b, dtype=float)),
+          add=lambda a, b: tuple(np.add(a, b, dtype=float).tolist()),
+          subtract=lambda a, b: tuple(np.subtract(a, b, dtype=float).tolist()),
+          scale=lambda a, scalar: tuple(np.multiply(a, scalar, dtype=float).tolist()),
+     )
+
+def available_backends() -> list[Backend]:
+     """Every backend that can run in this environment, besides the reference."""
+     candidates = (math_backend(), numpy_backend())
+     return [backend for backend in candidates if backend is not None]
+
+def random_coords(rng:random.Random, dimension:int, exponent:int, spread:int=3, zero_rate:float=0.05) -> tuple[float]:
+     """Random coordinates of magnitude around 10**exponent, each one shifted up to `spread` decades."""
+     return tuple(
+          0.0 if rng.random() < zero_rate else rng.uniform(-1, 1) * 10.0 ** (exponent + rng.randint(-spread, spread))
+          for _ in range(dimension)
+     )
+
+def generate_workload(size:int=500, dimensions:tuple[int]=(1, 2, 3, 4, 8, 64), exponents:tuple[int]=(-300, 300),
+                      norms:tuple[float]=(1, 2, 3), seed:int=0) -> list[dict]:
+     """Random cases across dimensions and magnitudes, reproducible from `seed`.
+
+     The default exponents span the whole float range, so the squares and cubes of the coordinates
+     overflow or underflow in many cases. check_equivalence compares those with the oracle instead.
+     """
+     assert size > 0, "The workload must have at least one case."
+     rng = random.Random(seed)
+     workload = []
+     for _ in range(size):
+          dimension = rng.choice(dimensions)
+          exponent = rng.randint(*exponents)
+          workload.append({
+               "a": random_coords(rng, dimension, exponent),
+               "b": random_coords(rng, dimension, exponent),
+               "scalar": rng.uniform(-1, 1) * 10.0 ** rng.randint(-3, 3),
+               "p": rng.choice(norms),
+          })
+     return workload
+
+_ARGUMENTS = {
+     "norm": lambda case: (case["a"], case["p"]),
+     "unitary": lambda case: (case["a"],),
+     "distance": lambda case: (case["a"], case["b"]),
+     "add": lambda case: (case["a"], case["b"]),
+     "subtract": lambda case: (case["a"], case["b"]),
+     "scale": lambda case: (case["a"], case["scalar"]),
+}
+
+class Result:
+     """Accuracy and timing of one operation of a backend against the reference.
+
+     Besides the failures, every case is sorted by how the reference did on it: `reference_errors`
+     when it raised, `reference_out_of_range` when it returned a result far from the exact one, and
+     `more_accurate` when the backend disagrees with the reference but is closer to the exact result.
+     """
+     def __init__(self, operation:str, backend:str, tolerance:Tolerance):
+          self.operation = operation
+          self.backend = backend
+          self.tolerance = tolerance
+          self.max_ulps = 0
+          self.max_rel = 0.0
+          self.failures = []
+          self.reference_errors = []
+          self.reference_out_of_range = []
+          self.more_accurate = []
+          self.calls = []
+          self.reference_time = None
+          self.backend_time = None
+
+     def __repr__(self):
+          status = "ok" if self.passed else f"{len(self.failures)} failures"
+          return f"Result ({self.backend}.{self.operation}) {status}"
+
+     @property
+     def passed(self) -> bool:
+          return not self.failures
+
+     @property
+     def speedup(self) -> float | None:
+          if not self.reference_time or not self.backend_time:
+               return None
+          return self.reference_time / self.backend_time
+
+def _worst(current:float, error:float) -> float:
+     """Larger of two errors, with NaN counting as infinite instead of being dropped by max()."""
+     return math.inf if math.isnan(error) else max(current, error)
+
+def check_equivalence(backend:Backend, workload:list[dict], reference:Backend=None,
+                      tolerances:dict=None, oracle:Backend=None) -> dict[str, Result]:
+     """Runs the workload through the backend and the reference, recording the worst errors and every case out of tolerance.
+
+     Where the reference raises or is out of REFERENCE_RANGE of the oracle, the backend is checked
+     against the oracle instead. A case where the backend raises is recorded as a failure with the
+     exception as its value. The worst errors only cover the cases checked against the reference.
+     """
+     reference = reference if reference else reference_backend()
+     oracle = oracle if oracle else oracle_backend()
+     tolerances = tolerances if tolerances else TOLERANCES
+     results = {}
+     for operation in OPERATIONS:
+          result = Result(operation, backend.name, tolerances[operation])
+          for case in workload:
+               args = _ARGUMENTS[operation](case)
+               exact = oracle[operation](*args)
+               try:
+                    expected = reference[operation](*args)
+               except Exception as error:
+                    expected = error
+                    result.reference_errors.append((args, error, exact))
+               try:
+                    value = backend[operation](*args)
+               except Exception as error:
+                    result.max_ulps = result.max_rel = math.inf
+                    result.failures.append((args, error, expected))
+                    continue
+               if isinstance(expected, Exception):
+                    if not result.tolerance.accepts(value, exact):
+                         result.failures.append((args, value, exact))
+                    continue
+               result.calls.append(args)
+               if not REFERENCE_RANGE.accepts(expected, exact):
+                    result.reference_out_of_range.append((args, expected, exact))
+                    if not result.tolerance.accepts(value, exact):
+                         result.failures.append((args, value, exact))
+                    continue
+               if result.tolerance.accepts(value, expected):
+                    result.max_ulps = _worst(result.max_ulps, ulp_distance(value, expected))
+                    result.max_rel = _worst(result.max_rel, relative_error(value, expected))
+               elif relative_error(value, exact) <= relative_error(expected, exact):
+                    result.more_accurate.append((args, value, expected, exact))
+               else:
+                    result.max_ulps = _worst(result.max_ulps, ulp_distance(value, expected))
+                    result.max_rel = _worst(result.max_rel, relative_error(value, expected))
+                    result.failures.append((args, value, expected))
+          results[operation] = result
+     return results
+
+def _best_time(function, calls:list[tuple], repeat:int) -> float:
+     best = math.inf
+     for _ in range(repeat):
+          start = time.perf_counter()
+          for args in calls:
+               function(*args)
+          best = min(best, time.perf_counter() - start)
+     return best
+
+def benchmark(backend:Backend, workload:list[dict], reference:Backend=None, tolerances:dict=None,
+              repeat:int=5) -> dict[str, Result]:
+     """Checks the backend against the reference and times both, keeping the best of `repeat` runs.
+
+     Only the cases where neither side raised are timed. Operations where the backend raised on
+     some case are not timed at all, so their speedup is None.
+     """
+     assert repeat > 0, "At least one timing run is needed."
+     reference = reference if reference else reference_backend()
+     results = check_equivalence(backend, workload, reference=reference, tolerances=tolerances)
+     for operation, result in results.items():
+          if not result.calls or any(isinstance(value, Exception) for _, value, _ in result.failures):
+               continue
+          result.reference_time = _best_time(reference[operation], result.calls, repeat)
+          result.backend_time = _best_time(backend[operation], result.calls, repeat)
+     return results
+
+def format_report(results:list[Result]) -> str:
+     """A table with the accuracy of every operation next to its speedup over the reference.
+
+     The ref err, ref range and better columns count the cases where the reference raised, was far
+     from the exact result, or was less accurate than the backend.
+     """
+     header = (
+          f"{'backend':<10} {'operation':<10} {'status':<8} {'max ulps':>10} {'max rel':>10} "
+          f"{'tolerance':>30} {'ref err':>8} {'ref range':>10} {'better':>7} {'speedup':>9}"
+     )
+     lines = [header, "-" * len(header)]
+     for result in results:
+          status = "ok" if result.passed else "FAIL"
+          speedup = f"{result.speedup:.2f}x" if result.speedup else "-"
+          lines.append(
+               f"{result.backend:<10} {result.operation:<10} {status:<8} {result.max_ulps:>10g} {result.max_rel:>10.2e} "
+               f"{repr(result.tolerance):>30} {len(result.reference_errors):>8} "
+               f"{len(result.reference_out_of_range):>10} {len(result.more_accurate):>7} {speedup:>9}"
+          )
+     return "\n".join(lines)
+
+def main(argv:list[str]=None) -> int:
+     parser = argparse.ArgumentParser(description="Compare every available backend with the reference Vector math.")
+     parser.add_argument("--size", type=int, default=500, help="number of random cases")
+     parser.add_argument("--seed", type=int, default=0, help="seed of the random workload")
+     parser.add_argument("--exponents", type=int, nargs=2, default=(-300, 300), metavar=("LOW", "HIGH"),
+                         help="range of the decimal exponents of the coordinates")
+     parser.add_argument("--repeat", type=int, default=5, help="timing runs per operation, the best one is kept")
+     args = parser.parse_args(argv)
+
+     workload = generate_workload(size=args.size, exponents=tuple(args.exponents), seed=args.seed)
+     results = []
+     for backend in available_backends():
+          results.extend(benchmark(backend, workload, repeat=args.repeat).values())
+     print(format_report(results))
+     return 0 if all(result.passed for result in results) else 1
+
+if __name__ == "__main__":
+     raise SystemExit(main())
@@ -0,0 +1,214 @@
+import pytest
+import math
+import sys
+
+from athanor.harness import (OPERATIONS, TOLERANCES, Backend, Tolerance, available_backends, benchmark,
+                             check_equivalence, format_report, generate_workload, main, math_backend,
+                             numpy_backend, oracle_backend, reference_backend, relative_error, ulp_distance)
+
+@pytest.fixture
+def workload():
+    """Small reproducible workload across dimensions and magnitudes."""
+    return generate_workload(size=300, seed=1234)
+
+# ---------- Error measures ----------
+
+def test_ulp_distance_scalars():
+    assert ulp_distance(1.0, 1.0) == 0
+    assert ulp_distance(math.nextafter(1.0, 2.0), 1.0) == 1
+    assert ulp_distance(-0.0, 0.0) == 0
+    assert ulp_distance(math.nextafter(0.0, 1.0), math.nextafter(0.0, -1.0)) == 2
+    assert ulp_distance(math.inf, 1.0) == math.inf
+
+def test_ulp_distance_tuples():
+    assert ulp_distance((1.0, 2.0), (1.0, math.nextafter(2.0, 3.0))) == 1
+    assert ulp_distance((1.0,), (1.0, 2.0)) == math.inf
+
+def test_relative_error():
+    assert relative_error(1.5, 1.5) == 0
+    assert math.isclose(relative_error(1.1, 1.0), 0.1)
+    assert relative_error(1e-300, 0.0) == math.inf
+    # Tuples are measured against their largest reference coordinate
+    assert math.isclose(relative_error((10.0, 1.1), (10.0, 1.0)), 0.01)
+    # A NaN after the first coordinate must not be hidden by max()
+    assert relative_error((1.0, math.nan), (1.0, 1.0)) == math.inf
+    assert relative_error((1.0, 1.0), (1.0, math.nan)) == math.inf
+
+def test_tolerance_accepts():
+    tolerance = Tolerance(ulps=2, rel=1e-12)
+    assert tolerance.accepts(math.nextafter(1.0, 2.0), 1.0)
+    assert tolerance.accepts(1.0 + 1e-13, 1.0)
+    assert not tolerance.accepts(1.0 + 1e-9, 1.0)
+    assert not Tolerance().accepts(math.nextafter(1.0, 2.0), 1.0)
+    assert not TOLERANCES["add"].accepts((1.0, math.nan), (1.0, 1.0))
+    assert not TOLERANCES["unitary"].accepts((0.6, math.nan), (0.6, 0.8))
+
+def test_tolerance_negative():
+    with pytest.raises(AssertionError):
+        Tolerance(ulps=-1)
+
+# ---------- Workload ----------
+
+def test_workload_is_reproducible():
+    assert generate_workload(size=50, seed=7) == generate_workload(size=50, seed=7)
+    assert generate_workload(size=50, seed=7) != generate_workload(size=50, seed=8)
+
+def test_workload_covers_dimensions_and_magnitudes(workload):
+    assert {len(case["a"]) for case in workload} == {1, 2, 3, 4, 8, 64}
+    assert all(len(case["a"]) == len(case["b"]) for case in workload)
+    magnitudes = [abs(coord) for case in workload for coord in case["a"] if coord]
+    assert min(magnitudes) < 1e-80 and max(magnitudes) > 1e80
+
+# ---------- Backends ----------
+
+def test_backend_missing_operation():
+    with pytest.raises(AssertionError, match="missing operations"):
+        Backend("partial", norm=abs)
+
+def test_reference_backend_matches_vector_math():
+    reference = reference_backend()
+    assert reference["norm"]((3.0, 4.0)) == 5.0
+    assert reference["norm"]((3.0, -4.0), 1) == 7.0
+    assert reference["unitary"]((3.0, 4.0)) == (0.6, 0.8)
+    assert reference["unitary"]((0.0, 0.0)) == (0.0, 0.0)
+    assert reference["distance"]((0.0, 0.0), (3.0, 4.0)) == 5.0
+    assert reference["add"]((3.0, 4.0), (2.0, 1.0)) == (5.0, 5.0)
+    assert reference["subtract"]((3.0, 4.0), (2.0, 1.0)) == (1.0, 3.0)
+    assert reference["scale"]((3.0, 4.0), 2.5) == (7.5, 10.0)
+
+def test_oracle_backend_beyond_reference_range():
+    oracle = oracle_backend()
+    assert oracle["norm"]((3.0, 4.0)) == 5.0
+    assert math.isclose(oracle["norm"]((1e200, 1e200), 3), 2 ** (1 / 3) * 1e200, rel_tol=1e-15)
+    assert math.isclose(oracle["norm"]((1e-200, 1e-200)), math.sqrt(2) * 1e-200, rel_tol=1e-15)
+    assert math.isclose(oracle["distance"]((1e-200, 0.0), (0.0, 1e-200)), math.sqrt(2) * 1e-200, rel_tol=1e-15)
+    assert oracle["unitary"]((1e-200, 0.0)) == (1.0, 0.0)
+    assert oracle["unitary"]((0.0, 0.0)) == (0.0, 0.0)
+    assert oracle["add"]((1e308,), (1e308,)) == (math.inf,)
+    assert oracle["scale"]((0.1,), 3.0) == (0.1 * 3.0,)
+
+def test_math_backend_zero_vector():
+    assert math_backend()["unitary"]((0.0, 0.0, 0.0)) == (0.0, 0.0, 0.0)
+
+def test_numpy_backend_results():
+    """The p-norm, zero vector and float conversion paths that random workloads rarely hit."""
+    pytest.importorskip("numpy")
+    backend = numpy_backend()
+    assert backend["norm"]((3.0, -4.0), 1) == 7.0
+    assert math.isclose(backend["norm"]((1e200, -1e200), 3), 2 ** (1 / 3) * 1e200, rel_tol=1e-15)
+    assert backend["norm"]((0.0, 0.0)) == 0.0
+    assert backend["unitary"]((0.0, 0.0, 0.0)) == (0.0, 0.0, 0.0)
+    assert backend["unitary"]((3.0, 4.0)) == (0.6, 0.8)
+    assert backend["distance"]((0.0, 0.0), (3.0, 4.0)) == 5.0
+    for value in (backend["norm"]((3.0, 4.0)), backend["distance"]((0.0,), (1.0,)),
+                  *backend["unitary"]((3.0, 4.0)), *backend["add"]((1.0,), (2.0,)), *backend["scale"]((1.0,), 2)):
+        assert type(value) is float
+
+def test_numpy_backend_unavailable(monkeypatch):
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    assert numpy_backend() is None
+    assert [backend.name for backend in available_backends()] == ["math"]
+
+@pytest.mark.parametrize("backend", available_backends(), ids=lambda backend: backend.name)
+def test_backend_equivalence(backend, workload):
+    """Every available backend matches the reference within the stated tolerances."""
+    results = check_equivalence(backend, workload)
+    assert set(results) == set(OPERATIONS)
+    for operation, result in results.items():
+        assert result.passed, f"{backend.name}.{operation}: {result.failures[:3]}"
+        assert result.tolerance is TOLERANCES[operation]
+
+def test_inaccurate_backend_is_detected(workload):
+    """A backend that drops the last bit of precision is reported as out of tolerance."""
+    math_ops = math_backend().operations
+    sloppy = Backend("sloppy", **dict(math_ops, norm=lambda a, p=2: math_ops["norm"](a, p) * (1 + 1e-9)))
+    results = check_equivalence(sloppy, workload)
+    assert not results["norm"].passed
+    assert results["norm"].max_rel > 1e-10
+    assert results["add"].passed
+
+def test_backend_off_by_thousand_ulps_is_detected(workload):
+    """The relative bound of the reductions is in the order of the stated ulps, not thousands of them."""
+    math_ops = math_backend().operations
+    drifting = Backend("drifting", **dict(math_ops, norm=lambda a, p=2: math_ops["norm"](a, p) * (1 + 1000 * 2 ** -52)))
+    results = check_equivalence(drifting, workload)
+    assert not results["norm"].passed
+    assert results["norm"].max_ulps >= 500
+
+def test_nan_backend_is_detected(workload):
+    """NaN coordinates are reported as failures with an infinite error, not dropped."""
+    math_ops = math_backend().operations
+    nan_tail = Backend("nan", **dict(math_ops, add=lambda a, b: math_ops["add"](a, b)[:1] + (math.nan,) * (len(a) - 1)))
+    results = check_equivalence(nan_tail, workload)
+    assert not results["add"].passed
+    assert results["add"].max_rel == math.inf
+    assert results["add"].max_ulps == math.inf
+
+def test_raising_backend_is_reported(workload):
+    """A backend that raises is recorded as failing instead of aborting the run."""
+    def broken(a, b):
+        raise ValueError("shape mismatch")
+
+    raising = Backend("raising", **dict(math_backend().operations, distance=broken))
+    results = benchmark(raising, workload[:20], repeat=1)
+    assert not results["distance"].passed
+    assert len(results["distance"].failures) == 20
+    assert isinstance(results["distance"].failures[0][1], ValueError)
+    assert results["distance"].speedup is None
+    assert results["norm"].passed
+    report = format_report(list(results.values()))
+    assert "FAIL" in report
+
+# ---------- Reference range ----------
+
+def test_overflow_workload():
+    """Where the reference raises OverflowError the backend is checked against the exact result."""
+    workload = generate_workload(size=300, exponents=(150, 160), seed=3)
+    results = check_equivalence(math_backend(), workload)
+    assert all(result.passed for result in results.values())
+    assert results["norm"].reference_errors
+    assert isinstance(results["norm"].reference_errors[0][1], OverflowError)
+
+def test_underflow_workload():
+    """Where the reference underflows the more accurate backend is not blamed for disagreeing."""
+    workload = generate_workload(size=300, exponents=(-200, -190), seed=1)
+    results = check_equivalence(math_backend(), workload)
+    assert all(result.passed for result in results.values())
+    assert len(results["distance"].reference_out_of_range) == len(workload)
+    # The same reference math run as a backend is wrong there, and is reported as such
+    results = check_equivalence(Backend("naive", **reference_backend().operations), workload)
+    assert not results["distance"].passed
+
+def test_raising_reference_is_recorded(workload):
+    """A reference that raises does not abort the run, the backend is checked against the exact result."""
+    def broken(a, b):
+        raise OverflowError("reference out of range")
+
+    reference = Backend("broken", **dict(reference_backend().operations, distance=broken))
+    results = benchmark(math_backend(), workload[:20], reference=reference, repeat=1)
+    assert len(results["distance"].reference_errors) == 20
+    assert results["distance"].passed
+    assert results["distance"].speedup is None
+    assert results["norm"].speedup is not None
+
+# ---------- Benchmark and report ----------
+
+def test_benchmark_reports_speedup(workload):
+    results = benchmark(math_backend(), workload[:20], repeat=1)
+    for result in results.values():
+        assert result.reference_time > 0
+        assert result.backend_time > 0
+        assert result.speedup == result.reference_time / result.backend_time
+
+def test_format_report(workload):
+    results = benchmark(math_backend(), workload[:20], repeat=1)
+    report = format_report(list(results.values()))
+    lines = report.splitlines()
+    assert len(lines) == 2 + len(OPERATIONS)
+    assert all(operation in report for operation in OPERATIONS)
+    assert "FAIL" not in report
+    assert "ref range" in report
+
+def test_main_overflow_range(capsys):
+    assert main(["--size", "30", "--repeat", "1", "--exponents", "150", "160"]) == 0
+    assert "norm" in capsys.readouterr().out